@@ -1,25 +1,115 @@
+import gzip
+import hashlib
 import logging
 import os
-import re
+import selectors
 import subprocess
 import threading
 import traceback
 from collections import OrderedDict
-from datetime import date, datetime, timedelta
-from time import sleep
+from datetime import datetime
+from email.utils import formatdate
+from functools import lru_cache
+from time import gmtime, monotonic, sleep, strftime
 from typing import IO
 
 import m3u8
 import pytz
 import requests
 import waitress
-from flask import Flask, Response, jsonify, redirect, request
+from flask import Flask, Response, json, redirect, request
 from flask.templating import render_template
 from locast2dvr.locast import LocastService
 from locast2dvr.ssdp import SSDPServer
 from locast2dvr.utils import Configuration
 from paste.translogger import TransLogger
 
+try:
+    # orjson serializes directly to bytes in native code, which is
+    # significantly faster than the stdlib for large EPG payloads.
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_dumps(data) -> bytes:
+    """Serialize `data` to JSON bytes, using orjson when it's installed
+
+    Args:
+        data: Data to serialize
+
+    Returns:
+        bytes: UTF-8 encoded JSON
+    """
+    if orjson:
+        return orjson.dumps(data)
+    return json.dumps(data).encode('utf-8')
+
+
+# Callsigns that get a "Network" group in the m3u lineup
+_NETWORK_CALLSIGNS = frozenset(['ABC', 'CBS', 'NBC', 'FOX', 'CW', 'PBS'])
+
+# Minimum body size before a gzip variant is kept in the response cache.
+# Compressing tiny bodies costs more than it saves.
+_GZIP_MIN_SIZE = 1024
+
+# The (somewhat fake) scan statuses are constants, so they are serialized
+# exactly once.
+_LINEUP_STATUS_SCANNING = _json_dumps({
+    "ScanInProgress": True,
+    "Progress": 50,
+    "Found": 5
+})
+_LINEUP_STATUS_IDLE = _json_dumps({
+    "ScanInProgress": False,
+    "ScanPossible": True,
+    "Source": "Antenna",
+    "SourceList": ["Antenna"]
+})
+
+
+# The date/time template filters below are called once per programme when
+# rendering epg.xml, which adds up to tens of thousands of calls per render.
+# Programme boundaries repeat across channels and days, so memoizing the
+# formatted strings collapses most calls into a dict lookup.
+
+@lru_cache(maxsize=16384)
+def _format_date(value: int) -> str:
+    return strftime('%Y%m%d', gmtime(value // 1000))
+
+
+@lru_cache(maxsize=16384)
+def _format_date_iso(value: int) -> str:
+    return strftime('%Y-%m-%d', gmtime(value // 1000))
+
+
+@lru_cache(maxsize=16384)
+def _format_time(value: int) -> str:
+    return strftime('%Y%m%d%H%M%S', gmtime(value // 1000))
+
+
+# pytz.timezone() does a registry lookup and potentially loads the tz
+# definition from disk, while we call it with the same DMA timezone for
+# every programme.
+_timezone = lru_cache(maxsize=64)(pytz.timezone)
+
+
+# Locast 'videoProperties' strings have very low cardinality (a handful of
+# distinct values across all programmes), so classifying them once and
+# caching the result turns the per-programme aspect/quality filters into a
+# dict lookup.
+@lru_cache(maxsize=32)
+def _classify_video(value: str) -> tuple:
+    hd = '1080' in value or '720' in value or 'HDTV' in value
+    return ('16:9' if hd else '4:3', 'HDTV' if 'HDTV' in value else 'SD')
+
+
+@lru_cache(maxsize=16384)
+def _format_time_local_iso(value: int, timezone: str) -> str:
+    datetime_in_utc = datetime.utcfromtimestamp(value / 1000)
+    datetime_in_local = _timezone(timezone).fromutc(datetime_in_utc)
+    return datetime_in_local.strftime('%Y-%m-%d %H:%M:%S')
+
 
 def start_http(config: Configuration, port: int, uid: str, locast_service: LocastService,
                ssdp: SSDPServer, log: logging.Logger):
@@ -86,6 +176,181 @@ def HTTPInterface(config: Configuration, port: int, uid: str, locast_service: Lo
 
     host_and_port = f'{config.bind_address}:{port}'
 
+    # Station list cache. locast_service.get_stations() can hit Locast's API
+    # (network I/O + JSON parsing), while PMS polls several endpoints that all
+    # need the same list. Within a `config.cache_ttl` window every handler
+    # works off the same list, and the version counter only increments when
+    # the station data actually changed, so response bodies can be reused
+    # until the stations do.
+    _stations_cache = {'ts': 0, 'version': 0, 'stations': None, 'enriched': None}
+    _stations_lock = threading.Lock()
+
+    def _enrich(stations: list) -> list:
+        """Precompute the derived per-station fields that the m3u and lineup
+        handlers need, so they aren't recomputed on every request
+
+        Args:
+            stations (list): Stations as returned by the locast service
+
+        Returns:
+            list: One dict per station with precomputed fields
+        """
+        watch = "watch_direct" if config.direct else "watch"
+        enriched = []
+        for station in stations:
+            callsign = name_only(station.get("callSign_remapped") or station.get(
+                "callSign") or station.get("name"))
+            city = station["city"]
+            networks = "Network" if callsign in _NETWORK_CALLSIGNS else ""
+            enriched.append({
+                "id": station["id"],
+                "name": station["name"],
+                "guide_number": station.get("channel_remapped") or station["channel"],
+                "callsign": callsign,
+                "city": city,
+                "logo": station.get("logoUrl") or station.get("logo226Url"),
+                "group_title": ";".join(filter(None, [city, networks])),
+                "tvg_name": f"{callsign} ({city})" if config.multiplex else callsign,
+                "watch_url": f"http://{host_and_port}/{watch}/{station['id']}",
+                "m3u_url": f"http://{host_and_port}/watch/{station['id']}.m3u",
+            })
+        return enriched
+
+    def _stations() -> tuple:
+        """Get the cached station list, its enriched counterpart and version,
+        refetching from the locast service when the cache is older than
+        `config.cache_ttl` seconds
+
+        Returns:
+            tuple: (stations, enriched, version)
+        """
+        now = monotonic()
+        with _stations_lock:
+            if (_stations_cache['stations'] is None or
+                    now - _stations_cache['ts'] >= config.cache_ttl):
+                stations = locast_service.get_stations()
+                if stations != _stations_cache['stations']:
+                    _stations_cache['version'] += 1
+                    _stations_cache['stations'] = stations
+                    _stations_cache['enriched'] = _enrich(stations)
+                _stations_cache['ts'] = now
+            return (_stations_cache['stations'], _stations_cache['enriched'],
+                    _stations_cache['version'])
+
+    # Cache of already serialized response bodies. PMS aggressively polls the
+    # lineup and EPG endpoints and every hit used to refetch and reserialize
+    # all stations. Entries map endpoint ->
+    # (timestamp, body, etag, version, last_modified, body_gz).
+    _response_cache = {}
+    _response_cache_lock = threading.Lock()
+
+    def _cached_response(endpoint: str, mimetype: str, generate, version: int = None) -> Response:
+        """Serve an endpoint from the response cache. Bodies keyed on a
+        station list version are regenerated when the version changes;
+        unversioned bodies are regenerated after `config.cache_ttl` seconds.
+        Clients that send a matching `If-None-Match` or `If-Modified-Since`
+        validator get a `304 Not Modified` without a body.
+
+        Args:
+            endpoint (str): Cache key, unique per endpoint
+            mimetype (str): Mimetype of the response
+            generate (Callable): Zero-argument callable producing the body
+            version (int): Station list version the body depends on (optional)
+
+        Returns:
+            Response: Cached response with ETag/Last-Modified/Cache-Control
+        """
+        now = monotonic()
+        with _response_cache_lock:
+            cached = _response_cache.get(endpoint)
+            if cached:
+                fresh = (cached[3] == version if version is not None
+                         else now - cached[0] < config.cache_ttl)
+            else:
+                fresh = False
+
+            if fresh:
+                (_, body, etag, _, last_modified, body_gz) = cached
+            else:
+                body = generate()
+                if isinstance(body, str):
+                    body = body.encode('utf-8')
+                etag = f'"{hashlib.md5(body).hexdigest()}"'
+                last_modified = formatdate(usegmt=True)
+                # Compress once per cache fill; EPG XML/JSON is repetitive
+                # markup and shrinks roughly an order of magnitude.
+                if len(body) >= _GZIP_MIN_SIZE:
+                    body_gz = gzip.compress(body, 6)
+                else:
+                    body_gz = None
+                _response_cache[endpoint] = (
+                    now, body, etag, version, last_modified, body_gz)
+
+        headers = {
+            'ETag': etag,
+            'Last-Modified': last_modified,
+            'Cache-Control': f'max-age={config.cache_ttl}, must-revalidate',
+            'Vary': 'Accept-Encoding'
+        }
+        if (request.headers.get('If-None-Match') == etag or
+                request.headers.get('If-Modified-Since') == last_modified):
+            return Response(status=304, headers=headers)
+
+        if body_gz is not None and 'gzip' in request.headers.get('Accept-Encoding', ''):
+            headers['Content-Encoding'] = 'gzip'
+            headers['Content-Length'] = str(len(body_gz))
+            return Response(body_gz, mimetype=mimetype, headers=headers,
+                            direct_passthrough=True)
+        return Response(body, mimetype=mimetype, headers=headers)
+
+    def _invalidate_response_cache():
+        """Drop all cached response bodies and force a station refetch on the
+        next request (e.g. after a station rescan)
+        """
+        with _stations_lock:
+            _stations_cache['ts'] = 0
+        with _response_cache_lock:
+            _response_cache.clear()
+
+    @lru_cache(maxsize=None)
+    def _template(name: str):
+        """Get a compiled Jinja template, bypassing render_template(), which
+        re-resolves the template and builds a full Flask template context on
+        every call. The XML templates only use the passed-in variables and
+        registered filters, so rendering the Template object directly is
+        enough.
+
+        Args:
+            name (str): Template name
+
+        Returns:
+            jinja2.Template: Compiled template
+        """
+        return app.jinja_env.get_template(name)
+
+    # Station scan state. Rebinding the station_scan argument inside
+    # lineup_post would create a local variable, so /lineup_status.json would
+    # never see a scan in progress. An Event is shared by reference instead.
+    # The station_scan argument seeds the initial state (used for testing).
+    _scanning = threading.Event()
+    if station_scan:
+        _scanning.set()
+    _scan_lock = threading.Lock()
+
+    # The device.xml, discover.json and lineup_status.json bodies only depend
+    # on values that are fixed for the lifetime of the app, so they are built
+    # on first request and served as plain bytes afterwards. Building them
+    # lazily (instead of at construction time) keeps the app cheap to create
+    # and guarantees an app context is available for rendering.
+    @lru_cache(maxsize=None)
+    def _device_xml_body() -> str:
+        return render_template('device.xml',
+                               device_model=config.device_model,
+                               device_version=config.device_version,
+                               friendly_name=locast_service.city,
+                               uid=uid,
+                               host_and_port=host_and_port)
+
     @app.route('/', methods=['GET'])
     @app.route('/device.xml', methods=['GET'])
     def device_xml() -> Response:
@@ -94,13 +359,7 @@ def HTTPInterface(config: Configuration, port: int, uid: str, locast_service: Lo
         Returns:
             Response: XML response
         """
-        xml = render_template('device.xml',
-                              device_model=config.device_model,
-                              device_version=config.device_version,
-                              friendly_name=locast_service.city,
-                              uid=uid,
-                              host_and_port=host_and_port)
-        return Response(xml, mimetype='text/xml')
+        return Response(_device_xml_body(), mimetype='text/xml')
 
     def _device_id_checksum(device_id: int) -> int:
         """Generate a HDHomerun checksum for a device ID.
@@ -128,18 +387,12 @@ def HTTPInterface(config: Configuration, port: int, uid: str, locast_service: Lo
 
         return checksum
 
-    @app.route('/discover.json', methods=['GET'])
-    def discover_json() -> Response:
-        """Return data about the device in JSON
-
-        Returns:
-            Response: JSON response containing device information
-        """
-
+    @lru_cache(maxsize=None)
+    def _discover_body() -> bytes:
         device_id = int(uid[:8], 16)  # Hex string to int
         valid_id = device_id + _device_id_checksum(device_id)
 
-        data = {
+        return _json_dumps({
             "FriendlyName": locast_service.city,
             "Manufacturer": "locast2dvr",
             "ModelNumber": config.device_model,
@@ -150,8 +403,17 @@ def HTTPInterface(config: Configuration, port: int, uid: str, locast_service: Lo
             "DeviceAuth": "locast2dvr",
             "BaseURL": f"http://{host_and_port}",
             "LineupURL": f"http://{host_and_port}/lineup.json"
-        }
-        return jsonify(data)
+        })
+
+    @app.route('/discover.json', methods=['GET'])
+    def discover_json() -> Response:
+        """Return data about the device in JSON
+
+        Returns:
+            Response: JSON response containing device information
+        """
+        return Response(_discover_body(), mimetype='application/json',
+                        headers={'Cache-Control': f'max-age={config.cache_ttl}'})
 
     @app.route('/lineup_status.json', methods=['GET'])
     def lineup_status_json() -> Response:
@@ -160,20 +422,11 @@ def HTTPInterface(config: Configuration, port: int, uid: str, locast_service: Lo
         Returns:
             Response: JSON containing scanning information
         """
-        if station_scan:
-            lineup_status = {
-                "ScanInProgress": True,
-                "Progress": 50,
-                "Found": 5
-            }
+        if _scanning.is_set():
+            body = _LINEUP_STATUS_SCANNING
         else:
-            lineup_status = {
-                "ScanInProgress": False,
-                "ScanPossible": True,
-                "Source": "Antenna",
-                "SourceList": ["Antenna"]
-            }
-        return jsonify(lineup_status)
+            body = _LINEUP_STATUS_IDLE
+        return Response(body, mimetype='application/json')
 
     @app.route('/lineup.m3u', methods=['GET'])
     @app.route('/tuner.m3u', methods=['GET'])
@@ -181,28 +434,22 @@ def HTTPInterface(config: Configuration, port: int, uid: str, locast_service: Lo
         """Returns all stations in m3u format
 
         Returns:
-            Response: m3u in text/plain
+            Response: m3u in audio/x-mpegurl
         """
-        m3uText = "#EXTM3U\n"
-        for station in locast_service.get_stations():
-            callsign = name_only(station.get("callSign_remapped") or station.get(
-                "callSign") or station.get("name"))
-            city = station["city"]
-            logo = station.get("logoUrl") or station.get("logo226Url")
-            channel = station.get("channel_remapped") or station["channel"]
-            networks = "Network" if callsign in [
-                'ABC', 'CBS', 'NBC', 'FOX', 'CW', 'PBS'] else ""
-            groups = ";".join(filter(None, [city, networks]))
-            url = f"http://{host_and_port}/watch/{station['id']}.m3u"
-
-            tvg_name = f"{callsign} ({city})" if config.multiplex else callsign
-
-            m3uText += f'#EXTINF:-1 tvg-id="channel.{station["id"]}" tvg-name="{tvg_name}" tvg-logo="{logo}" tvg-chno="{channel}" group-title="{groups}", {callsign}'
-
-            if config.multiplex:
-                m3uText += f' ({city})'
-            m3uText += f'\n{url}\n\n'
-        return m3uText
+        (_, enriched, version) = _stations()
+
+        def generate():
+            # Build the m3u as a list of fragments and join once at the end,
+            # so the body grows in linear instead of quadratic time.
+            parts = ["#EXTM3U\n"]
+            append = parts.append
+            # The displayed name equals tvg_name in both multiplex and
+            # single-city mode, so there's no per-station branch here.
+            for station in enriched:
+                append(
+                    f'#EXTINF:-1 tvg-id="channel.{station["id"]}" tvg-name="{station["tvg_name"]}" tvg-logo="{station["logo"]}" tvg-chno="{station["guide_number"]}" group-title="{station["group_title"]}", {station["tvg_name"]}\n{station["m3u_url"]}\n\n')
+            return "".join(parts)
+        return _cached_response('lineup.m3u', 'audio/x-mpegurl', generate, version)
 
     @app.template_filter()
     def name_only(value: str) -> str:
@@ -214,11 +461,14 @@ def HTTPInterface(config: Configuration, port: int, uid: str, locast_service: Lo
         Returns:
             str: Parsed string or original value
         """
-        m = re.match(r'\d+\.\d+ (.+)', value)
-        if m:
-            return m.group(1)
-        else:
-            return value
+        # name_only() is called for every station on every m3u/EPG render,
+        # so we use plain string ops instead of a regex.
+        head, sep, tail = value.partition(' ')
+        if sep and '.' in head:
+            major, _, minor = head.partition('.')
+            if major.isdigit() and minor.isdigit():
+                return tail
+        return value
 
     @app.route('/lineup.json', methods=['GET'])
     def lineup_json() -> Response:
@@ -227,13 +477,15 @@ def HTTPInterface(config: Configuration, port: int, uid: str, locast_service: Lo
         Returns:
             Response: JSON containing the GuideNumber, GuideName and URL for each channel
         """
-        watch = "watch_direct" if config.direct else "watch"
+        (_, enriched, version) = _stations()
 
-        return jsonify([{
-            "GuideNumber": station.get('channel_remapped') or station['channel'],
-            "GuideName": station['name'],
-            "URL": f"http://{host_and_port}/{watch}/{station['id']}"
-        } for station in locast_service.get_stations()])
+        def generate():
+            return _json_dumps([{
+                "GuideNumber": station["guide_number"],
+                "GuideName": station["name"],
+                "URL": station["watch_url"]
+            } for station in enriched])
+        return _cached_response('lineup.json', 'application/json', generate, version)
 
     @app.route('/epg', methods=['GET'])
     def epg() -> Response:
@@ -242,18 +494,28 @@ def HTTPInterface(config: Configuration, port: int, uid: str, locast_service: Lo
         Returns:
             Response: JSON containing the EPG for this DMA
         """
-        return jsonify(locast_service.get_stations())
+        (stations, _, version) = _stations()
+
+        def generate():
+            return _json_dumps(stations)
+        return _cached_response('epg', 'application/json', generate, version)
+
+    # The configuration is fixed for the lifetime of the app, so the scrubbed
+    # copy is serialized once instead of on every request.
+    @lru_cache(maxsize=None)
+    def _config_body() -> bytes:
+        c = dict(config)
+        c['password'] = "*********"
+        return _json_dumps(c)
 
     @app.route('/config', methods=['GET'])
     def output_config() -> Response:
-        """Returns the Electronic Programming Guide in json format
+        """Returns the configuration in json format, with the password scrubbed
 
         Returns:
-            Response: JSON containing the EPG for this DMA
+            Response: JSON containing the current configuration
         """
-        c = dict(config)
-        c['password'] = "*********"
-        return jsonify(c)
+        return Response(_config_body(), mimetype='application/json')
 
     @app.template_filter()
     def format_date(value: int) -> str:
@@ -266,7 +528,7 @@ def HTTPInterface(config: Configuration, port: int, uid: str, locast_service: Lo
             str: String as YYYYmmdd
         """
 
-        return (datetime(1970, 1, 1) + timedelta(milliseconds=value)).strftime('%Y%m%d')
+        return _format_date(value)
 
     @app.template_filter()
     def format_date_iso(value: int) -> str:
@@ -279,7 +541,7 @@ def HTTPInterface(config: Configuration, port: int, uid: str, locast_service: Lo
             str: String as YYYY-mm-dd
         """
 
-        return (datetime(1970, 1, 1) + timedelta(milliseconds=value)).strftime('%Y-%m-%d')
+        return _format_date_iso(value)
 
     @app.template_filter()
     def format_time(value: int) -> str:
@@ -291,7 +553,7 @@ def HTTPInterface(config: Configuration, port: int, uid: str, locast_service: Lo
         Returns:
             str: String as YYYYmmdddHHMMSS
         """
-        return (datetime(1970, 1, 1) + timedelta(milliseconds=value)).strftime('%Y%m%d%H%M%S')
+        return _format_time(value)
 
     @app.template_filter()
     def format_time_local_iso(value: int, timezone: str) -> str:
@@ -304,9 +566,7 @@ def HTTPInterface(config: Configuration, port: int, uid: str, locast_service: Lo
         Returns:
             str: String as YYYY-mm-dd HH:MM:SS
         """
-        datetime_in_utc = datetime(1970, 1, 1) + timedelta(milliseconds=value)
-        datetime_in_local = pytz.timezone(timezone).fromutc(datetime_in_utc)
-        return datetime_in_local.strftime('%Y-%m-%d %H:%M:%S')
+        return _format_time_local_iso(value, timezone)
 
     @app.template_filter()
     def aspect(value: str) -> str:
@@ -318,10 +578,7 @@ def HTTPInterface(config: Configuration, port: int, uid: str, locast_service: Lo
         Returns:
             str: aspect ratio. Either '4:3' or '16:9'
         """
-        for r in ["1080", "720", "HDTV"]:
-            if r in value:
-                return "16:9"
-        return "4:3"
+        return _classify_video(value)[0]
 
     @app.template_filter()
     def quality(value: str) -> str:
@@ -333,10 +590,7 @@ def HTTPInterface(config: Configuration, port: int, uid: str, locast_service: Lo
         Returns:
             str: quality. Either 'SD' or 'HDTV'
         """
-        if "HDTV" in value:
-            return "HDTV"
-        else:
-            return "SD"
+        return _classify_video(value)[1]
 
     @app.route('/epg.xml', methods=['GET'])
     def epg_xml() -> Response:
@@ -345,10 +599,12 @@ def HTTPInterface(config: Configuration, port: int, uid: str, locast_service: Lo
         Returns:
             Response: XMLTV
         """
-        xml = render_template('epg.xml',
-                              stations=locast_service.get_stations(),
-                              url_base=host_and_port)
-        return Response(xml, mimetype='text/xml')
+        (stations, _, version) = _stations()
+
+        def generate():
+            return _template('epg.xml').render(stations=stations,
+                                               url_base=host_and_port)
+        return _cached_response('epg.xml', 'text/xml', generate, version)
 
     @app.route('/lineup.xml', methods=['GET'])
     def lineup_xml() -> Response:
@@ -358,24 +614,61 @@ def HTTPInterface(config: Configuration, port: int, uid: str, locast_service: Lo
             Response: XML containing the GuideNumber, GuideName and URL for each channel
         """
         watch = "watch_direct" if config.direct else "watch"
-        xml = render_template('lineup.xml',
-                              stations=locast_service.get_stations(),
-                              url_base=host_and_port,
-                              watch=watch).encode("utf-8")
-        return Response(xml, mimetype='text/xml')
+        (stations, _, version) = _stations()
+
+        def generate():
+            return _template('lineup.xml').render(stations=stations,
+                                                  url_base=host_and_port,
+                                                  watch=watch)
+        return _cached_response('lineup.xml', 'text/xml', generate, version)
 
     @app.route('/lineup.post', methods=['POST', 'GET'])
     def lineup_post():
         """Initiate a rescan of stations for this Tuner"""
         scan = request.args.get('scan')
         if scan == 'start':
-            station_scan = True
-            stations = locast_service.get_stations()
-            station_scan = False
+            # PMS polls this endpoint aggressively. Only one scan runs at a
+            # time; concurrent requests return immediately.
+            if not _scan_lock.acquire(blocking=False):
+                return ('', 204)
+            _scanning.set()
+            try:
+                locast_service.get_stations()
+            finally:
+                _scanning.clear()
+                _scan_lock.release()
+            _invalidate_response_cache()
             return ('', 204)
 
         return (f'{scan} is not a valid scan command', 400)
 
+    # Per-channel stream URI cache. Resolving a stream URI costs a Locast API
+    # round trip plus an m3u8 download, while the tokenized URIs stay valid
+    # well beyond `config.cache_ttl`. PMS tends to hit a channel several
+    # times in quick succession (e.g. during a channel scan).
+    _uri_cache = {}
+    _uri_cache_lock = threading.Lock()
+
+    def _stream_uri(channel_id: str) -> str:
+        """Get the stream URI for a channel, cached for `config.cache_ttl`
+        seconds
+
+        Args:
+            channel_id (str): Channel ID
+
+        Returns:
+            str: Locast stream URI
+        """
+        now = monotonic()
+        with _uri_cache_lock:
+            cached = _uri_cache.get(channel_id)
+            if cached and now - cached[0] < config.cache_ttl:
+                return cached[1]
+        uri = locast_service.get_station_stream_uri(channel_id)
+        with _uri_cache_lock:
+            _uri_cache[channel_id] = (now, uri)
+        return uri
+
     @app.route('/watch/<channel_id>.m3u')
     def watch_m3u(channel_id: str) -> Response:
         """Stream the channel based on it's ID. This route redirects to a locast m3u.
@@ -388,7 +681,11 @@ def HTTPInterface(config: Configuration, port: int, uid: str, locast_service: Lo
         """
         log.info(
             f"Watching channel {channel_id} on {host_and_port} for {locast_service.city} using m3u")
-        return redirect(locast_service.get_station_stream_uri(channel_id), code=302)
+        # 302 (not 301) on purpose: the URI is tokenized and must not be
+        # cached by clients beyond the TTL below.
+        response = redirect(_stream_uri(channel_id), code=302)
+        response.headers['Cache-Control'] = f'max-age={config.cache_ttl}'
+        return response
 
     @app.route('/watch/<channel_id>')
     def watch_ffmpeg(channel_id: str) -> Response:
@@ -412,19 +709,28 @@ def HTTPInterface(config: Configuration, port: int, uid: str, locast_service: Lo
         ffmpeg_cmd = [ffmpeg, "-i", uri, "-codec",
                       "copy", "-f", "mpegts", "pipe:1"]
 
+        # bufsize=0 skips the BufferedReader on stdout (we read the raw fd in
+        # _stream_ffmpeg anyway), and stderr is only piped when we actually
+        # drain it: a piped-but-undrained stderr eventually fills up and
+        # stalls ffmpeg mid-stream.
+        stderr = subprocess.PIPE if config.verbose > 0 else subprocess.DEVNULL
         ffmpeg_proc = subprocess.Popen(
-            ffmpeg_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            ffmpeg_cmd, stdout=subprocess.PIPE, stderr=stderr,
+            bufsize=0, close_fds=True)
 
         # use a signal to indicate threads running or not
         signal = RunningSignal(True)
 
-        # Start a thread that reads ffmpeg stderr and logs it to our logger.
-        t = threading.Thread(target=_log_output, args=(
-            config, ffmpeg_proc.stderr, signal))
-        t.setDaemon(True)
-        t.start()
+        # Start a thread that reads ffmpeg stderr and logs it to our logger,
+        # but only when we actually log it. Without this check we'd leave a
+        # thread spinning on stderr for every stream.
+        if stderr is subprocess.PIPE:
+            t = threading.Thread(target=_log_output, args=(
+                config, ffmpeg_proc.stderr, signal))
+            t.setDaemon(True)
+            t.start()
 
-        return Response(_stream_ffmpeg(config, ffmpeg_proc, signal), content_type='video/mpeg; codecs="avc1.4D401E')
+        return Response(_stream_ffmpeg(config, ffmpeg_proc, signal), content_type='video/mpeg; codecs="avc1.4D401E', direct_passthrough=True)
 
     @app.route('/watch_direct/<channel_id>')
     def watch_direct(channel_id: str) -> Response:
@@ -470,7 +776,9 @@ class RunningSignal:
 
 
 def _stream_ffmpeg(config: Configuration, ffmpeg_proc: subprocess.Popen, signal: RunningSignal):
-    """Yields n bytes from ffmpeg and terminates the ffmpeg subprocess on exceptions (like client disconnecting)
+    """Yields n bytes from ffmpeg and terminates the ffmpeg subprocess on
+    EOF or exceptions (like client disconnecting)
+
     Args:
         config (Configuration): Global locast2dvr config object
         ffmpeg_proc (subprocess.Popen): FFMPeg process that has been started
@@ -479,14 +787,20 @@ def _stream_ffmpeg(config: Configuration, ffmpeg_proc: subprocess.Popen, signal:
     Yields:
         bytes: raw mpeg bytes from ffmpeg
     """
+    # Read from the raw file descriptor instead of the BufferedReader on
+    # ffmpeg_proc.stdout, which copies every chunk into an extra buffer.
+    fd = ffmpeg_proc.stdout.fileno()
     while True:
         try:
-            yield ffmpeg_proc.stdout.read(config.bytes_per_read)
+            chunk = os.read(fd, config.bytes_per_read)
+            if not chunk:
+                break
+            yield chunk
         except:
-            ffmpeg_proc.terminate()
-            ffmpeg_proc.communicate()
-            signal.stop()
             break
+    ffmpeg_proc.terminate()
+    ffmpeg_proc.communicate()
+    signal.stop()
 
 
 def _stream_direct(config: Configuration, stream_uri: str, log: logging.Logger):
@@ -638,13 +952,21 @@ def _log_output(config: Configuration, stderr: IO, signal: RunningSignal):
     """
     if config.verbose > 0:
         logger = logging.getLogger("ffmpeg")
+        # Poll stderr with a timeout instead of blocking in readline(), so
+        # the thread notices signal.stop() and exits instead of hanging on a
+        # file descriptor that will never produce output again.
+        sel = selectors.DefaultSelector()
+        sel.register(stderr, selectors.EVENT_READ)
         while signal.running():
             try:
+                if not sel.select(timeout=0.5):
+                    continue
                 line = _readline(stderr)
                 if line != '':
                     logger.info(line)
             except:
                 pass
+        sel.close()
         logger.debug("Logging thread ended")
 
 
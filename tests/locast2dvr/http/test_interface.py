@@ -1,4 +1,5 @@
 # Even though these imports seem unused, we patch them
+import gzip
 import json
 import os
 import subprocess
@@ -24,7 +25,8 @@ class TestHTTPInterface(unittest.TestCase):
             "device_firmware": "DEVICE_FIRMWARE",
             "tuner_count": 3,
             "multiplex": False,
-            "direct": False
+            "direct": False,
+            "cache_ttl": 60
         })
         port = 6077
         self.locast_service = MagicMock()
@@ -162,6 +164,43 @@ class TestHTTPInterface(unittest.TestCase):
         data = self.client.get('/epg').data.decode('utf-8')
         self.assertEqual(json.loads(data), self.locast_service.get_stations())
 
+    def test_lineup_json_cached(self):
+        response = self.client.get('/lineup.json')
+        etag = response.headers['ETag']
+        last_modified = response.headers['Last-Modified']
+        self.assertEqual(response.headers['Cache-Control'],
+                         'max-age=60, must-revalidate')
+        self.locast_service.get_stations.reset_mock()
+
+        response = self.client.get('/lineup.json')
+        self.assertEqual(response.headers['ETag'], etag)
+        self.locast_service.get_stations.assert_not_called()
+
+        response = self.client.get(
+            '/lineup.json', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(
+            '/lineup.json', headers={'If-Modified-Since': last_modified})
+        self.assertEqual(response.status_code, 304)
+
+    def test_epg_gzip(self):
+        # Large enough to get a gzip variant in the response cache
+        self.locast_service.get_stations.return_value = [
+            {
+                "name": f"NAME{i}",
+                "callSign": "CBS",
+                "city": "Chicago",
+                "id": str(i),
+                "channel": "1.1",
+            } for i in range(100)
+        ]
+
+        response = self.client.get('/epg', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        data = gzip.decompress(response.data).decode('utf-8')
+        self.assertEqual(json.loads(data), self.locast_service.get_stations())
+
 
 def free_var(val):
     def nested():
@@ -185,7 +224,8 @@ class TestInterfaceWatch(unittest.TestCase):
             "ffmpeg": "ffmpeg_bin",
             "bytes_per_read": 1024,
             "verbose": 0,
-            "direct": False
+            "direct": False,
+            "cache_ttl": 60
         })
         self.port = 6077
         self.locast_service = MagicMock()
@@ -200,6 +240,18 @@ class TestInterfaceWatch(unittest.TestCase):
         self.assertIsInstance(response, Response)
         self.assertEqual(response.status_code, 302)
         self.assertEqual(response.location, "http://actual_url")
+        self.assertEqual(response.headers['Cache-Control'], 'max-age=60')
+
+    def test_watch_m3u_cached(self):
+        self.locast_service.get_station_stream_uri.return_value = "http://actual_url"
+        self.client.get('/watch/1234.m3u')
+        response: Response = self.client.get('/watch/1234.m3u')
+
+        # The second request within the TTL is served from the URI cache
+        self.locast_service.get_station_stream_uri.assert_called_once_with(
+            "1234")
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.location, "http://actual_url")
 
     @patch('locast2dvr.http.interface._stream_direct')
     def test_watch_direct(self, stream_direct: MagicMock):
@@ -234,16 +286,43 @@ class TestInterfaceWatch(unittest.TestCase):
         Popen.assert_called_once_with([
             'ffmpeg_bin', '-i', 'http://actual_url',
             '-codec', 'copy', '-f', 'mpegts', 'pipe:1',
-        ], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        ], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=0, close_fds=True)
         self.assertIsInstance(response, Response)
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.content_type,
                          'video/mpeg; codecs="avc1.4D401E')
 
+        # No log thread is started when verbose logging is off
+        Thread.assert_not_called()
+
+        stream_ffmpeg.assert_called_once_with(
+            self.config, ffmpeg_proc, signal)
+
+    @patch('locast2dvr.http.interface.RunningSignal')
+    @patch('locast2dvr.http.interface._log_output')
+    @patch('locast2dvr.http.interface._stream_ffmpeg')
+    @patch('locast2dvr.http.interface.threading.Thread')
+    @patch('locast2dvr.http.interface.subprocess.Popen')
+    def test_watch_ffmpeg_verbose(self, Popen: MagicMock, Thread: MagicMock, stream_ffmpeg: MagicMock, _log_output: MagicMock, Signal: MagicMock):
+        self.config.verbose = 1
+        self.locast_service.get_station_stream_uri.return_value = "http://actual_url"
+        Popen.return_value = ffmpeg_proc = MagicMock()
+        ffmpeg_proc.stderr = stderr = MagicMock()
+        Thread.return_value = thread = MagicMock()
+        Signal.return_value = signal = MagicMock()
+
+        response: Response = self.client.get('/watch/1234')
+        self.assertEqual(response.status_code, 200)
+
+        Popen.assert_called_once_with([
+            'ffmpeg_bin', '-i', 'http://actual_url',
+            '-codec', 'copy', '-f', 'mpegts', 'pipe:1',
+        ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0, close_fds=True)
+
         Thread.assert_called_once_with(target=_log_output, args=({
             'bind_address': '5.4.3.2',
-            'ffmpeg': 'ffmpeg_bin', 'bytes_per_read': 1024, 'verbose': 0,
-            'direct': False
+            'ffmpeg': 'ffmpeg_bin', 'bytes_per_read': 1024, 'verbose': 1,
+            'direct': False, 'cache_ttl': 60
         }, stderr, signal))
         thread.setDaemon.assert_called_once_with(True)
         thread.start.assert_called()
@@ -259,7 +338,10 @@ class TestInterfaceEPGXML(unittest.TestCase):
             "device_version": "1.23.4",
             "bind_address": "5.4.3.2",
             "device_firmware": "DEVICE_FIRMWARE",
-            "tuner_count": 3
+            "tuner_count": 3,
+            "multiplex": False,
+            "direct": False,
+            "cache_ttl": 60
         })
         port = 6077
         self.locast_service = MagicMock()
@@ -447,9 +529,10 @@ class TestLogOutput(unittest.TestCase):
         stderr.readline.assert_not_called()
         signal.running.assert_not_called()
 
+    @patch('locast2dvr.http.interface.selectors')
     @patch('locast2dvr.http.interface.logging.getLogger')
     @patch('locast2dvr.http.interface._readline')
-    def test_verbose(self, _readline: MagicMock, getLogger: MagicMock):
+    def test_verbose(self, _readline: MagicMock, getLogger: MagicMock, selectors: MagicMock):
         config = Configuration({
             'verbose': 1
         })
@@ -470,9 +553,10 @@ class TestLogOutput(unittest.TestCase):
     def raise_exception():
         raise Exception
 
+    @patch('locast2dvr.http.interface.selectors')
     @patch('locast2dvr.http.interface.logging.getLogger')
     @patch('locast2dvr.http.interface._readline')
-    def test_verbose_exception(self, _readline: MagicMock, getLogger: MagicMock):
+    def test_verbose_exception(self, _readline: MagicMock, getLogger: MagicMock, selectors: MagicMock):
         config = Configuration({
             'verbose': 1
         })
@@ -503,31 +587,53 @@ class TestStreamFFMpeg(unittest.TestCase):
             'bytes_per_read': 1024
         })
 
-    def test_stream(self):
+    @patch('locast2dvr.http.interface.os.read')
+    def test_stream(self, read_mock: MagicMock):
         ffmpeg_proc = MagicMock()
-        ffmpeg_proc.stdout.read = read_mock = MagicMock()
+        ffmpeg_proc.stdout.fileno.return_value = 10
         signal = RunningSignal(True)
-        read_mock.side_effect = ['foo', 'bar', 'baz']
+        read_mock.side_effect = [b'foo', b'bar', b'baz']
 
         s = _stream_ffmpeg(self.config, ffmpeg_proc, signal)
 
         ret = next(s)
-        read_mock.assert_called_with(1024)
-        self.assertEqual(ret, 'foo')
+        read_mock.assert_called_with(10, 1024)
+        self.assertEqual(ret, b'foo')
         ret = next(s)
-        self.assertEqual(ret, 'bar')
+        self.assertEqual(ret, b'bar')
         ret = next(s)
-        self.assertEqual(ret, 'baz')
+        self.assertEqual(ret, b'baz')
         self.assertTrue(signal.running())
         ffmpeg_proc.terminate.assert_not_called()
         ffmpeg_proc.communicate.assert_not_called()
 
+    @patch('locast2dvr.http.interface.os.read')
+    def test_stream_eof(self, read_mock: MagicMock):
+        ffmpeg_proc = MagicMock()
+        ffmpeg_proc.stdout.fileno.return_value = 10
+        signal = RunningSignal(True)
+        read_mock.side_effect = [b'foo', b'']
+
+        s = _stream_ffmpeg(self.config, ffmpeg_proc, signal)
+
+        ret = next(s)
+        self.assertEqual(ret, b'foo')
+        try:
+            next(s)
+        except StopIteration:
+            pass
+
+        self.assertFalse(signal.running())
+        ffmpeg_proc.terminate.assert_called()
+        ffmpeg_proc.communicate.assert_called()
+
     def raise_exception():
         raise Exception
 
-    def test_stream_exception(self):
+    @patch('locast2dvr.http.interface.os.read')
+    def test_stream_exception(self, read_mock: MagicMock):
         ffmpeg_proc = MagicMock()
-        ffmpeg_proc.stdout.read = read_mock = MagicMock()
+        ffmpeg_proc.stdout.fileno.return_value = 10
         signal = RunningSignal(True)
         read_mock.side_effect = self.raise_exception
 
@@ -538,7 +644,7 @@ class TestStreamFFMpeg(unittest.TestCase):
         except StopIteration:
             pass
 
-        read_mock.assert_called_with(1024)
+        read_mock.assert_called_with(10, 1024)
 
         ffmpeg_proc.terminate.assert_called()
         ffmpeg_proc.communicate.assert_called()